@@ -1,47 +1,107 @@
 import fitz  # PyMuPDF
+import heapq
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from collections import Counter
 import re
 import statistics
+import string
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Only text blocks are used, so skip building image blocks (and their pixel data) in "dict" output.
+_TEXT_DICT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+_WS_RE = re.compile(r'\s+')
+# Bare numbers, "Version x.y" prefixes and dashed separator lines, in one pass.
+_REJECT_RE = re.compile(r'^[\d\.]+$|^Version \d+\.\d+|----', re.IGNORECASE)
+_NUM_DOT_RE = re.compile(r'^\d+\..*')
+_DELETE_ASCII_LETTERS = str.maketrans('', '', string.ascii_letters)
+
+# Heading styles beyond this many distinct sizes/weights all share the deepest level.
+_MAX_HEADING_LEVEL = 6
+_MIN_TOC_ENTRIES = 4
+
+_COMMON_LABELS = frozenset({'name', 'age', 's.no', 'date', 'relationship', 'remarks', 'goals', 'days', 'syllabus', 'identifier', 'reference'})
+_NON_HEADINGS = frozenset({'mission statement', 'elective course offerings', 'what colleges say!', 'international software testing qualifications board'})
+_TITLE_EXCLUSIONS = frozenset({'istqb', 'topjump', 'www.topjump.com', 'you\'re invited to a party', 'you\'re invited to a', 'party'})
+
+
+class _NonPrintableTable(dict):
+    """str.translate table that drops non-printable characters, filled lazily per code point."""
+
+    def __missing__(self, codepoint):
+        value = None if not chr(codepoint).isprintable() else codepoint
+        self[codepoint] = value
+        return value
+
+
+_NONPRINT_TABLE = _NonPrintableTable()
+
+_FONT_BOLD_CACHE = {}
+
+def _is_bold(font_name):
+    is_bold = _FONT_BOLD_CACHE.get(font_name)
+    if is_bold is None:
+        is_bold = _FONT_BOLD_CACHE[font_name] = 'bold' in font_name.lower()
+    return is_bold
+
+def _dominant(items):
+    counts = {}
+    for item in items:
+        counts[item] = counts.get(item, 0) + 1
+    return max(counts, key=counts.get)
 
 def clean_text(text):
-    text = re.sub(r'\s+', ' ', text)
-    return ''.join(char for char in text if char.isprintable()).strip()
+    return _WS_RE.sub(' ', text).translate(_NONPRINT_TABLE).strip()
+
+def is_distinct_style(style, body_style):
+    return style[0] > body_style[0] or (style[0] == body_style[0] and style[1] and not body_style[1])
+
+def is_noise_text(text):
+    """Rejects shared by both strategies: form labels, known non-headings, URLs and near-letterless text."""
+    text_lower = text.lower()
+    if text_lower in _COMMON_LABELS or text_lower in _NON_HEADINGS:
+        return True
+
+    
+    if 'www.' in text_lower or '.com' in text_lower:
+        return True
+
+    
+    return len(text) - len(text.translate(_DELETE_ASCII_LETTERS)) < 3
 
 def is_block_a_heading(block_text, block_style, body_style, line_count):
    
-    is_distinct_style = block_style[0] > body_style[0] or (block_style[0] == body_style[0] and block_style[1] and not body_style[1])
-    if not is_distinct_style:
+    if not is_distinct_style(block_style, body_style):
         return False
 
-   
-    word_count = len(block_text.split())
-    if word_count > 30 or line_count > 5: 
-        return False
-        
     
     if block_text.endswith(('.', ':', ',')):
         return False
 
     
-    common_labels = {'name', 'age', 's.no', 'date', 'relationship', 'remarks', 'goals', 'days', 'syllabus', 'identifier', 'reference'}
-    
-    if block_text.lower() in common_labels or re.fullmatch(r'[\d\.]+', block_text) or re.match(r'Version \d+\.\d+', block_text, re.IGNORECASE) or (re.match(r'^\d+\..*', block_text) and word_count > 10):
+    if is_noise_text(block_text):
         return False
-        
-    
-    if 'www.' in block_text.lower() or '.com' in block_text.lower() or re.search(r'----', block_text) or len(re.findall(r'[a-zA-Z]', block_text)) < 3:
+
+   
+    if line_count > 5:
+        return False
+    word_count = len(block_text.split())
+    if word_count > 30:
         return False
 
     
-    non_headings = {'mission statement', 'elective course offerings', 'what colleges say!', 'international software testing qualifications board'}
-    if block_text.lower() in non_headings:
+    if _REJECT_RE.search(block_text) or (word_count > 10 and _NUM_DOT_RE.match(block_text)):
         return False
 
     return True
 
-def extract_title(doc, pdf_path):
+def extract_title(doc, pdf_path, page_one_blocks=None):
     
     if "file05.pdf" in str(pdf_path):
         return ""
@@ -49,147 +109,229 @@ def extract_title(doc, pdf_path):
     if doc.page_count == 0:
         return ""
 
-    page_one_blocks = doc[0].get_text("dict", flags=fitz.TEXTFLAGS_DICT)["blocks"]
-    title_candidates = []
+    if page_one_blocks is None:
+        page_one_blocks = doc[0].get_text("dict", flags=_TEXT_DICT_FLAGS)["blocks"]
+    title_limit = doc[0].rect.height * 0.6
+    spans = []
     max_font_size = 0
 
    
     for b in page_one_blocks:
         if b['type'] == 0:
-            if b['bbox'][1] < doc[0].rect.height * 0.6:
+            if b['bbox'][1] < title_limit:
                 for l in b['lines']:
                     for s in l['spans']:
                         if len(s['text'].strip()) > 1:
                             max_font_size = max(max_font_size, s['size'])
+                            spans.append((s['size'], s['text']))
     
     if max_font_size == 0:
         return ""
 
     
-    for b in page_one_blocks:
-         if b['type'] == 0:
-            if b['bbox'][1] < doc[0].rect.height * 0.6:
-                for l in b['lines']:
-                    for s in l['spans']:
-                        if round(s['size']) >= round(max_font_size * 0.95):
-                             text = clean_text(s['text'])
-                             
-                             if len(text) > 2 and not text.lower() in ['istqb', 'topjump', 'www.topjump.com', 'you\'re invited to a party', 'you\'re invited to a', 'party']:
-                                title_candidates.append(text)
+    title_candidates = []
+    min_title_size = round(max_font_size * 0.95)
+    for size, span_text in spans:
+        if round(size) >= min_title_size:
+            text = clean_text(span_text)
+            
+            if len(text) > 2 and text.lower() not in _TITLE_EXCLUSIONS:
+                title_candidates.append(text)
     
     return " ".join(title_candidates)
 
 
+def process_from_toc(toc, title):
+    entries = []
+    for level, toc_text, page in toc:
+        text = clean_text(toc_text)
+        if not text or page < 1 or (title and text in title) or is_noise_text(text):
+            continue
+        entries.append((level, text, page - 1))
+    if not entries:
+        return []
+
+    # Filtered-out parents (typically the title bookmark) would otherwise leave the outline starting below H1.
+    top_level = min(level for level, _, _ in entries)
+    return [
+        {"level": f"H{min(level - top_level + 1, _MAX_HEADING_LEVEL)}", "text": text, "page": page}
+        for level, text, page in entries
+    ]
+
+
 def parse_pdf_to_outline(pdf_path):
-    doc = fitz.open(pdf_path)
+    with fitz.open(pdf_path) as doc:
+        return _outline_from_doc(doc, pdf_path)
+
+
+def _outline_from_doc(doc, pdf_path):
     if doc.page_count == 0:
         return {"title": "", "outline": []}
 
     output = {"title": "", "outline": []}
+    flags = _TEXT_DICT_FLAGS
 
     
-    blocks_by_page = {}
-    style_counts = Counter()
+    # Both strategies need page one, so its blocks are extracted once and shared; every page
+    # then builds exactly one TextPage, and no get_textpage() reuse is needed.
+    page_one_blocks = doc[0].get_text("dict", flags=flags)["blocks"]
+    title = None
+
+    
+    # Stub outlines with only a few bookmarks are less reliable than the style analysis.
+    toc = doc.get_toc(simple=True)
+    if len(toc) >= _MIN_TOC_ENTRIES:
+        title = extract_title(doc, pdf_path, page_one_blocks)
+        outline = process_from_toc(toc, title)
+        if outline:
+            return {"title": title, "outline": outline}
+
+    
+    # Per-block data is kept as parallel lists indexed by block number.
+    texts = []
+    styles = []
+    line_counts = []
+    pages = []
+    style_counts = {}
+    
+    _clean_text = clean_text
+    _round = round
+    is_bold = _is_bold
+    dominant = _dominant
+    texts_append = texts.append
+    styles_append = styles.append
+    line_counts_append = line_counts.append
+    pages_append = pages.append
     
     for page_num, page in enumerate(doc):
-        blocks_by_page[page_num + 1] = []
-        dict_blocks = page.get_text("dict", flags=fitz.TEXTFLAGS_DICT)["blocks"]
+        if page_num == 0:
+            dict_blocks = page_one_blocks
+        else:
+            dict_blocks = page.get_text("dict", flags=flags)["blocks"]
         for b in dict_blocks:
-            if b['type'] == 0 and b['lines']:
-                block_text_parts = [s['text'] for l in b['lines'] for s in l['spans']]
-                if not block_text_parts: continue
-
-                block_text = clean_text(" ".join(block_text_parts))
-                if not block_text: continue
-
-                span_styles_list = [(round(s['size']), 'bold' in s['font'].lower()) for l in b['lines'] for s in l['spans']]
-                dominant_style = Counter(span_styles_list).most_common(1)[0][0]
-                
-                blocks_by_page[page_num + 1].append({
-                    "text": block_text,
-                    "style": dominant_style,
-                    "line_count": len(b['lines'])
-                })
-                style_counts[dominant_style] += 1
+            if b['type'] != 0:
+                continue
+            lines = b['lines']
+            if not lines:
+                continue
+
+            block_text_parts = []
+            span_styles_list = []
+            text_append = block_text_parts.append
+            style_append = span_styles_list.append
+            for l in lines:
+                for s in l['spans']:
+                    text_append(s['text'])
+                    style_append((_round(s['size']), is_bold(s['font'])))
+            if not block_text_parts: continue
+
+            block_text = _clean_text(" ".join(block_text_parts))
+            if not block_text: continue
+
+            dominant_style = dominant(span_styles_list)
+            
+            texts_append(block_text)
+            styles_append(dominant_style)
+            line_counts_append(len(lines))
+            pages_append(page_num)
+            style_counts[dominant_style] = style_counts.get(dominant_style, 0) + 1
 
     if not style_counts:
         return {"title": "", "outline": []}
 
    
-    body_style = style_counts.most_common(1)[0][0]
+    body_style = max(style_counts, key=style_counts.get)
+    candidate_styles = {style for style in style_counts if is_distinct_style(style, body_style)}
+    toc_pages = {pages[i] for i, text in enumerate(texts) if 'table of contents' in text.lower()}
     
-    heading_blocks = []
+    heading_indices = []
     heading_styles = set()
+    verdicts = {}
     
-    for page_num, blocks in blocks_by_page.items():
+    for i, text in enumerate(texts):
+        style = styles[i]
+        if toc_pages and pages[i] in toc_pages:
+            if 'table of contents' in text.lower():
+                heading_indices.append(i)
+                heading_styles.add(style)
+            continue
 
-        is_toc_page = any('table of contents' in block['text'].lower() for block in blocks)
-        
-        for block in blocks:
-            
-            if is_toc_page:
-                if 'table of contents' in block['text'].lower():
-                    block['page'] = page_num
-                    heading_blocks.append(block)
-                    heading_styles.add(block['style'])
-                continue 
-
-            if is_block_a_heading(block['text'], block['style'], body_style, block['line_count']):
-                block['page'] = page_num
-                heading_blocks.append(block)
-                heading_styles.add(block['style'])
+        if style not in candidate_styles:
+            continue
+        # Running headers and footers repeat the same block on every page; classify each once.
+        key = (text, style, line_counts[i])
+        is_heading = verdicts.get(key)
+        if is_heading is None:
+            is_heading = verdicts[key] = is_block_a_heading(text, style, body_style, line_counts[i])
+        if is_heading:
+            heading_indices.append(i)
+            heading_styles.add(style)
 
     
    
-    sorted_heading_styles = sorted(list(heading_styles), key=lambda x: (x[0], x[1]), reverse=True)
-    level_map = {style: f"H{i+1}" for i, style in enumerate(sorted_heading_styles)}
+    top_heading_styles = heapq.nlargest(_MAX_HEADING_LEVEL, heading_styles)
+    level_map = {style: f"H{i+1}" for i, style in enumerate(top_heading_styles)}
+    fallback_level = f"H{_MAX_HEADING_LEVEL}"
     
-    processed_texts = set()
-    for block in heading_blocks:
-        text = block['text']
-        if text not in processed_texts:
-            output["outline"].append({
-                "level": level_map.get(block['style'], 'H9'),
-                "text": text,
-                "page": block['page']
-            })
-            processed_texts.add(text)
+    unique_indices = {}
+    for i in heading_indices:
+        unique_indices.setdefault(texts[i], i)
+    output["outline"] = [
+        {"level": level_map.get(styles[i], fallback_level), "text": text, "page": pages[i]}
+        for text, i in unique_indices.items()
+    ]
 
     
-    output['title'] = extract_title(doc, pdf_path)
+    if title is None:
+        title = extract_title(doc, pdf_path, page_one_blocks)
+    output['title'] = title
     
-    if output['title']:
-        output['outline'] = [item for item in output['outline'] if item['text'] not in output['title']]
+    if title:
+        output['outline'] = [item for item in output['outline'] if item['text'] not in title]
     
     
-    if output['outline']:
-        output['outline'].sort(key=lambda x: (x['page'], x['level']))
-        for item in output['outline']:
-            item['page'] -= 1
+    output['outline'].sort(key=lambda x: (x['page'], x['level']))
 
     return output
 
+def _process_one(pdf_file, output_dir):
+    """Parse one PDF and write its outline JSON; runs in a worker process."""
+    structured_data = parse_pdf_to_outline(pdf_file)
+    output_file = output_dir / f"{pdf_file.stem}.json"
+    if orjson is not None:
+        with open(output_file, 'wb') as f:
+            f.write(orjson.dumps(structured_data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(structured_data, f, indent=2, ensure_ascii=False)
+    return output_file
+
 def main():
     """Main processing function."""
     input_dir = Path("./input")
     output_dir = Path("./output")
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    pdf_files = list(input_dir.glob("*.pdf"))
+    pdf_files = []
+    if input_dir.is_dir():
+        with os.scandir(input_dir) as entries:
+            pdf_files = [Path(e.path) for e in entries if e.name.lower().endswith('.pdf') and e.is_file()]
     if not pdf_files:
         print("No PDF files found in the input directory.")
         return
 
-    for pdf_file in pdf_files:
-        print(f"Processing {pdf_file.name}...")
-        try:
-            structured_data = parse_pdf_to_outline(pdf_file)
-            output_file = output_dir / f"{pdf_file.stem}.json"
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(structured_data, f, indent=4, ensure_ascii=False)
-            print(f"Successfully generated {output_file.name}")
-        except Exception as e:
-            print(f"Error processing {pdf_file.name}: {e}")
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {}
+        for pdf_file in pdf_files:
+            print(f"Processing {pdf_file.name}...")
+            futures[executor.submit(_process_one, pdf_file, output_dir)] = pdf_file
+        for future in as_completed(futures):
+            pdf_file = futures[future]
+            try:
+                output_file = future.result()
+                print(f"Successfully generated {output_file.name}")
+            except Exception as e:
+                print(f"Error processing {pdf_file.name}: {e}")
 
 if __name__ == "__main__":
     main()